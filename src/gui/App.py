@@ -1,30 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import winsound  # For Windows sound - alternative for other OS
-import time
 import threading
+from keyer import Keyer
+from translate import MORSE_CODE_DICT, encode_message, decode_message, table_id
+from player import Player
 
 class App:
     # Modified to accept an optional master (Tkinter root)
-    def __init__(self, master=None):
-        self.morse_code_dict = {
-            'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.',
-            'F': '..-.', 'G': '--.', 'H': '....', 'I': '..', 'J': '.---',
-            'K': '-.-', 'L': '.-..', 'M': '--', 'N': '-.', 'O': '---',
-            'P': '.--.', 'Q': '--.-', 'R': '.-.', 'S': '...', 'T': '-',
-            'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-', 'Y': '-.--',
-            'Z': '--..',
-            '0': '-----', '1': '.----', '2': '..---', '3': '...--',
-            '4': '....-', '5': '.....', '6': '-....-', '7': '--...',
-            '8': '---..', '9': '----.',
-            '.': '.-.-.-', ',': '--..--', '?': '..--..', "'": '.----.',
-            '!': '-.-.--', '/': '-..-.', '(': '-.--.', ')': '-.--.-',
-            '&': '.-...', ':': '---...', ';': '-.-.-.', '=': '-...-',
-            '+': '.-.-.', '-': '-....-', '_': '..--.-', '"': '.-..-.',
-            '$': '...-..-', '@': '.--.-.', ' ': '/'
-        }
+    # an optional Player (e.g. one driven by a fake clock in tests)
+    # and an optional SessionRecorder to keep an audit log of the session
+    # (closed by on_close, which writes the index readers seek with)
+    def __init__(self, master=None, player=None, recorder=None):
+        self.morse_code_dict = dict(MORSE_CODE_DICT)
         
         self.reverse_morse_dict = {v: k for k, v in self.morse_code_dict.items()}
+        self.table_id = table_id(self.morse_code_dict)
+        self.recorder = recorder
         
         # Use provided master if available, otherwise create a new Tkinter root
         self.root = master if master else tk.Tk()
@@ -41,6 +32,15 @@ class App:
         
         self.root.configure(bg=self.bg_color)
         
+        self.keyer = Keyer(
+            self.reverse_morse_dict,
+            on_char=self._on_keyed_char,
+            on_element=self._on_keyed_element
+        )
+        self.keying_active = False
+        
+        self.player = player if player else Player()
+        
         self.create_widgets()
         
         self.playback_active = False
@@ -132,6 +132,27 @@ class App:
         )
         self.dash_feedback.pack(side=tk.LEFT, padx=5)
         
+        progress_frame = tk.Frame(self.root, bg=self.bg_color)
+        progress_frame.pack(fill=tk.X, padx=10)
+        
+        self.progress_var = tk.DoubleVar(value=0.0)
+        ttk.Progressbar(
+            progress_frame,
+            variable=self.progress_var,
+            maximum=1.0,
+            mode="determinate"
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.time_var = tk.StringVar(value="")
+        tk.Label(
+            progress_frame,
+            textvariable=self.time_var,
+            font=("Arial", 8),
+            fg=self.fg_color,
+            bg=self.bg_color,
+            width=14
+        ).pack(side=tk.LEFT, padx=5)
+        
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
         status_bar = tk.Label(
@@ -312,6 +333,22 @@ class App:
             pady=5
         ).pack(side=tk.LEFT, padx=5)
         
+        # Straight key: hold the mouse button or the space bar (while focused) to key
+        self.key_button = tk.Button(
+            button_frame,
+            text="Key",
+            bg="#4CAF50",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=10,
+            pady=5
+        )
+        self.key_button.pack(side=tk.LEFT, padx=5)
+        self.key_button.bind("<ButtonPress-1>", self.key_down)
+        self.key_button.bind("<ButtonRelease-1>", self.key_up)
+        self.key_button.bind("<KeyPress-space>", self.key_down)
+        self.key_button.bind("<KeyRelease-space>", self.key_up)
+        
         output_frame = tk.Frame(decode_tab, bg=self.bg_color)
         output_frame.pack(pady=10, padx=10, fill=tk.X)
         
@@ -341,20 +378,14 @@ class App:
             return
             
         try:
-            morse_code_elements = []
-            for char in text:
-                if char in self.morse_code_dict:
-                    morse_code_elements.append(self.morse_code_dict[char])
-                else:
-                    morse_code_elements.append(char)  # Keep unsupported characters as-is
-            
-            morse_text = ' '.join(morse_code_elements)
+            morse_text = encode_message(text, self.morse_code_dict)
             
             self.encode_output.config(state=tk.NORMAL)
             self.encode_output.delete("1.0", tk.END)
             self.encode_output.insert(tk.END, morse_text)
             self.encode_output.config(state=tk.DISABLED)
             
+            self._record('encode', text, morse_text)
             self.status_var.set("Text encoded successfully")
         except Exception as e:
             self.status_var.set(f"Error: {str(e)}")
@@ -366,31 +397,14 @@ class App:
             return
             
         try:
-            decoded_words = []
-            words_morse = morse_code_input.split('/')
-            
-            for word_morse in words_morse:
-                # Use .split() without args to handle multiple spaces and leading/trailing spaces
-                characters_morse = word_morse.strip().split() # This splits by any whitespace and removes empty strings
-                
-                decoded_chars = []
-                for char_morse in characters_morse:
-                    if char_morse in self.reverse_morse_dict:
-                        decoded_chars.append(self.reverse_morse_dict[char_morse])
-                    else:
-                        decoded_chars.append(char_morse) # Keep unknown codes as-is
-                
-                # Join characters to form a word with single spaces between them.
-                decoded_words.append(' '.join(decoded_chars))
-            
-            # Join words with a single space. Filter(None, ...) handles empty strings if multiple '/' were present.
-            decoded_str = ' '.join(filter(None, decoded_words)).strip()
+            decoded_str = decode_message(morse_code_input, self.reverse_morse_dict)
             
             self.decode_output.config(state=tk.NORMAL)
             self.decode_output.delete("1.0", tk.END)
             self.decode_output.insert(tk.END, decoded_str)
             self.decode_output.config(state=tk.DISABLED)
             
+            self._record('decode', morse_code_input, decoded_str)
             self.status_var.set("Morse code decoded successfully")
         except Exception as e:
             self.status_var.set(f"Error: {str(e)}")
@@ -409,6 +423,9 @@ class App:
             
         self.playback_active = True
         self.status_var.set("Playing Morse code...")
+        self.progress_var.set(0.0)  # Don't show the last playback's position
+        self.time_var.set("")
+        self._record('play', morse_text, '')
         
         # Pass morse_text, dot_feedback, and dash_feedback to the new thread
         threading.Thread(target=self._play_morse_sound, args=(morse_text, self.dot_feedback, self.dash_feedback), daemon=True).start()
@@ -427,32 +444,29 @@ class App:
             
         self.playback_active = True
         self.status_var.set("Playing Morse code...")
+        self.progress_var.set(0.0)  # Don't show the last playback's position
+        self.time_var.set("")
+        self._record('play', morse_text, '')
         
         # Pass morse_text, dot_feedback, and dash_feedback to the new thread
         threading.Thread(target=self._play_morse_sound, args=(morse_text, self.dot_feedback, self.dash_feedback), daemon=True).start()
     
-    def _play_morse_sound(self, morse_text, dot_btn, dash_btn):
+    def _play_morse_sound(self, morse_text, dot_btn, dash_btn, start_ms=0):
         # All Tkinter widget manipulations must be scheduled via root.after
-        # Sound playing and time.sleep can happen directly in the thread.
+        # Sound playing and sleeping happen directly in the thread, in the player.
+        def on_element(element, active):
+            btn = dot_btn if element == '.' else dash_btn
+            color = self.sound_active_color if active else self.bg_color
+            self.root.after(0, lambda: btn.config(bg=color))
+        
         try:
-            for char in morse_text:
-                if not self.playback_active:
-                    break
-                    
-                if char == '.':
-                    self.root.after(0, lambda: dot_btn.config(bg=self.sound_active_color))
-                    winsound.Beep(800, 200)
-                    self.root.after(0, lambda: dot_btn.config(bg=self.bg_color))
-                    time.sleep(0.1)
-                elif char == '-':
-                    self.root.after(0, lambda: dash_btn.config(bg=self.sound_active_color))
-                    winsound.Beep(600, 400)
-                    self.root.after(0, lambda: dash_btn.config(bg=self.bg_color))
-                    time.sleep(0.1)
-                elif char == ' ':
-                    time.sleep(0.3)
-                elif char == '/':
-                    time.sleep(0.7)
+            self.player.play(
+                morse_text,
+                start_ms=start_ms,
+                is_active=lambda: self.playback_active,
+                on_element=on_element,
+                on_progress=self._schedule_progress
+            )
             
             self.root.after(0, lambda: dot_btn.config(bg=self.bg_color))
             self.root.after(0, lambda: dash_btn.config(bg=self.bg_color))
@@ -461,6 +475,64 @@ class App:
             self.playback_active = False
             self.root.after(0, lambda: self.status_var.set("Playback finished"))
     
+    def _schedule_progress(self, index, position):
+        # Called from the playback thread once per character gap
+        progress = index.progress(position)
+        elapsed = f"{index.start_of(position) / 1000:.1f}s / {index.total_ms / 1000:.1f}s"
+        self.root.after(0, lambda: (self.progress_var.set(progress), self.time_var.set(elapsed)))
+    
+    def playback_eta(self):
+        # Seconds left in the current (or last) playback
+        return self.player.remaining_ms() / 1000
+    
+    def key_down(self, event=None):
+        if not self.keying_active:
+            self.keying_active = True
+            self.keyer.reset()
+            self.decode_output.config(state=tk.NORMAL)
+            self.decode_output.delete("1.0", tk.END)
+            self.decode_output.config(state=tk.DISABLED)
+            self.status_var.set(f"Keying... ({self.keyer.wpm:.0f} WPM)")
+            self._poll_keyer()
+        self.keyer.press()
+        self.key_button.config(bg=self.sound_active_color)
+        return "break"
+    
+    def key_up(self, event=None):
+        self.keyer.release()
+        self.key_button.config(bg="#4CAF50")
+        return "break"
+    
+    def _poll_keyer(self):
+        if not self.keying_active:
+            return
+        self.keyer.poll()
+        # Stop polling once the operator has been idle for a while
+        idle = self.keyer.idle_for()
+        if idle is not None and idle > 3.0:
+            # Log without the word space the idle gap itself produced
+            text = self.keyer.finish().rstrip()
+            self._record('decode', self.keyer.morse.rstrip(' /'), text)
+            self.keying_active = False
+            self.status_var.set("Keyed input decoded")
+            return
+        self.root.after(10, self._poll_keyer)
+    
+    def _on_keyed_char(self, char):
+        self.decode_output.config(state=tk.NORMAL)
+        self.decode_output.insert(tk.END, char)
+        self.decode_output.config(state=tk.DISABLED)
+        self.status_var.set(f"Keying... ({self.keyer.wpm:.0f} WPM)")
+    
+    def _on_keyed_element(self, element):
+        btn = self.dot_feedback if element == '.' else self.dash_feedback
+        btn.config(bg=self.sound_active_color)
+        self.root.after(100, lambda: btn.config(bg=self.bg_color))
+    
+    def _record(self, kind, input_text, output_text):
+        if self.recorder:
+            self.recorder.record(kind, input_text, output_text, self.table_id, self.player.model)
+    
     def clear_encode(self):
         self.encode_input.delete("1.0", tk.END)
         self.encode_output.config(state=tk.NORMAL)
@@ -481,6 +553,8 @@ class App:
     
     def on_close(self):
         self.playback_active = False
+        if self.recorder:
+            self.recorder.close()
         self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+from player import Player
+from timing import DEFAULT_TIMING
+
+# Headless test harness: a fake clock and a recording audio backend, so
+# playback and keying can be exercised without Tk, a sound device or real time.
+
+
+class FakeClock:
+    # Time only moves when something sleeps. Kept in whole microseconds so long
+    # runs add up exactly.
+    def __init__(self, start=0.0):
+        self._us = round(start * 1_000_000)
+
+    @property
+    def now(self):
+        return self._us / 1_000_000
+
+    def monotonic(self):
+        return self.now
+
+    __call__ = monotonic
+
+    def sleep(self, seconds):
+        self._us += round(seconds * 1_000_000)
+
+    def advance(self, seconds):
+        self.sleep(seconds)
+
+
+class RecordingAudio:
+    # Records (start time, freq, duration_ms) for every beep and advances the clock
+    def __init__(self, clock):
+        self.clock = clock
+        self.beeps = []
+
+    def beep(self, freq, duration_ms):
+        self.beeps.append((self.clock.now, freq, duration_ms))
+        self.clock.sleep(duration_ms / 1000)
+
+
+def headless_player(model=DEFAULT_TIMING, clock=None):
+    # Returns (player, clock, audio) wired together
+    clock = clock or FakeClock()
+    audio = RecordingAudio(clock)
+    return Player(model, audio=audio, sleep=clock.sleep), clock, audio
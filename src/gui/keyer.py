@@ -0,0 +1,208 @@
+import time
+from collections import deque
+
+# Straight-key / paddle input decoder.
+#
+# Key press and release events are timestamped with a monotonic clock. Marks are
+# classified as dots or dashes against an adaptive dot-length estimate, and gaps
+# as element, character or word spaces (1, 3 and 7 dot units in standard timing).
+# Characters are decoded incrementally through the reverse Morse table as soon as
+# the silence after the last element is long enough to rule out another element,
+# which keeps latency well under one character time.
+#
+# The dot estimate comes from the shortest cluster (durations under twice the
+# shortest) of the recent marks and gaps. That cluster is one unit when a mark
+# is clearly longer than it (dots and dashes, or an element gap between dashes),
+# so the estimate locks on within a character whatever the initial speed. When
+# the window can't tell (e.g. only dashes and character gaps) the cluster is
+# either dots or dashes, and the reading closer to the current estimate wins.
+# The pending character keeps its raw mark and gap lengths and is re-classified
+# (and re-split on gaps that turn out to be character gaps) when it is flushed.
+#
+# Marks and gaps shorter than DEBOUNCE are contact bounce: a short mark is
+# dropped and a short gap joins the marks either side of it.
+
+# Decision thresholds in dot units
+DASH_THRESHOLD = 2.0   # marks at least this long are dashes
+CHAR_THRESHOLD = 2.0   # gaps at least this long end a character
+WORD_THRESHOLD = 5.0   # gaps at least this long end a word
+
+# Keep the estimate between roughly 5 and 60 WPM
+MIN_DOT = 0.02
+MAX_DOT = 0.24
+
+DEBOUNCE = 0.01  # Seconds; half a dot at 60 WPM
+
+
+class Keyer:
+    def __init__(self, reverse_dict, on_char=None, on_element=None, clock=None,
+                 initial_wpm=15, window=8):
+        self.reverse_dict = reverse_dict
+        self.on_char = on_char          # called with each decoded character (or ' ')
+        self.on_element = on_element    # called with '.' or '-' as each mark is classified
+        self.clock = clock or time.monotonic
+        self.dot = 1.2 / initial_wpm    # PARIS timing: one dot is 1.2 / WPM seconds
+
+        self._durations = deque(maxlen=window)  # Recent (duration, is_gap) pairs
+        self._reopen = None  # Undo state for the last mark, in case the key bounces
+
+        self.elements = []  # Provisional classification of the pending marks
+        self._marks = []
+        self._gaps = []
+        self.text = []
+        self.codes = []  # Morse for every decoded character, '/' for word spaces
+        self._pressed_at = None
+        self._released_at = None
+        self._spaced = True  # No word space before the first character
+
+    @property
+    def wpm(self):
+        return 1.2 / self.dot
+
+    @property
+    def morse(self):
+        return ' '.join(self.codes)
+
+    def press(self, t=None):
+        t = self.clock() if t is None else t
+        if self._pressed_at is not None:
+            return  # Ignore key auto-repeat
+        if self._released_at is not None and t - self._released_at < DEBOUNCE and self._reopen:
+            # The contact bounced open: the last mark continues
+            self._pressed_at, self.dot, durations = self._reopen
+            self._durations.clear()
+            self._durations.extend(durations)
+            self._marks.pop()
+            self.elements.pop()
+            self._released_at = None  # Its gap is already counted
+            self._reopen = None
+            return
+        self._pressed_at = t
+
+    def release(self, t=None):
+        t = self.clock() if t is None else t
+        if self._pressed_at is None:
+            return
+        duration = t - self._pressed_at
+        if duration < DEBOUNCE:
+            self._pressed_at = None  # The contact bounced closed: not a mark
+            return
+        # Observe the gap and the mark before classifying the gap, so a slow
+        # first dot can't end its character before the dash that follows
+        gap = None
+        if self._released_at is not None:
+            gap = self._pressed_at - self._released_at
+            self._observe(gap, is_gap=True)
+        self._reopen = (self._pressed_at, self.dot, tuple(self._durations))
+        self._observe(duration, is_gap=False)
+        if gap is not None:
+            self._gap(gap)
+        self._mark(duration)
+        self._pressed_at = None
+        self._released_at = t
+
+    def poll(self, t=None):
+        # Call periodically while keying so characters are emitted without
+        # waiting for the next key press.
+        t = self.clock() if t is None else t
+        if self._pressed_at is None and self._released_at is not None:
+            self._silence(t - self._released_at)
+
+    def idle_for(self, t=None):
+        # Seconds since the key was last released, or None while keying.
+        if self._pressed_at is not None or self._released_at is None:
+            return None
+        t = self.clock() if t is None else t
+        return t - self._released_at
+
+    def finish(self):
+        # Flush whatever is still pending, e.g. at the end of a recorded trace.
+        if self._marks:
+            self._flush()
+        self._pressed_at = None
+        self._released_at = None
+        self._reopen = None
+        return ''.join(self.text)
+
+    def reset(self):
+        self.elements = []
+        self._marks = []
+        self._gaps = []
+        self.text = []
+        self.codes = []
+        self._pressed_at = None
+        self._released_at = None
+        self._reopen = None
+        self._spaced = True
+
+    def _gap(self, gap):
+        if self._marks and gap < CHAR_THRESHOLD * self.dot:
+            self._gaps.append(gap)
+        else:
+            self._silence(gap)
+
+    def _mark(self, duration):
+        element = self._classify(duration)
+        self._marks.append(duration)
+        self.elements.append(element)
+        if self.on_element:
+            self.on_element(element)
+
+    def _classify(self, duration):
+        return '.' if duration < DASH_THRESHOLD * self.dot else '-'
+
+    def _silence(self, gap):
+        if self._marks and gap >= CHAR_THRESHOLD * self.dot:
+            self._flush()
+        if not self._spaced and gap >= WORD_THRESHOLD * self.dot:
+            self.codes.append('/')
+            self._emit(' ')
+            self._spaced = True
+
+    def _flush(self):
+        # Re-classify with the current estimate: gaps taken as intra-character
+        # under an earlier, slower estimate may really be character gaps.
+        char_marks = [self._marks[0]]
+        for gap, mark in zip(self._gaps, self._marks[1:]):
+            if gap >= CHAR_THRESHOLD * self.dot:
+                self._flush_char(char_marks)
+                char_marks = []
+            char_marks.append(mark)
+        self._flush_char(char_marks)
+        self.elements = []
+        self._marks = []
+        self._gaps = []
+        self._spaced = False
+
+    def _flush_char(self, marks):
+        code = ''.join(self._classify(mark) for mark in marks)
+        self.codes.append(code)
+        self._emit(self.reverse_dict.get(code, code))  # Keep unknown codes as-is
+
+    def _emit(self, char):
+        self.text.append(char)
+        if self.on_char:
+            self.on_char(char)
+
+    def _observe(self, duration, is_gap):
+        self._durations.append((duration, is_gap))
+        shortest = min(d for d, _ in self._durations)
+        unit = [d for d, _ in self._durations if d < 2 * shortest]
+        estimate = sum(unit) / len(unit)
+        if not any(not gap and d >= 2 * shortest for d, gap in self._durations):
+            # Dots or dashes? Pick the reading nearer the current estimate (on a
+            # log scale the two readings are split at sqrt(3) times it).
+            if estimate > 3 ** 0.5 * self.dot:
+                estimate /= 3
+        self.dot = min(max(estimate, MIN_DOT), MAX_DOT)
+
+
+def decode_timings(events, reverse_dict, initial_wpm=15):
+    # Decode a recorded trace of (timestamp, is_down) key events offline.
+    keyer = Keyer(reverse_dict, initial_wpm=initial_wpm)
+    for t, is_down in events:
+        if is_down:
+            keyer.press(t)
+        else:
+            keyer.release(t)
+    return keyer.finish()
@@ -0,0 +1,77 @@
+import time
+
+try:
+    import winsound  # For Windows sound
+except ImportError:  # Other platforms play silently with the same timing
+    winsound = None
+
+from timing import DEFAULT_TIMING, timing_index
+
+# Morse playback scheduler, independent of the GUI.
+#
+# The Player walks a Morse string, beeping through an audio backend and
+# sleeping through its sleep function. Both are injectable, so playback can be
+# driven by a fake clock (see harness.py) instead of real time.
+
+
+class WinsoundAudio:
+    def beep(self, freq, duration_ms):
+        winsound.Beep(freq, duration_ms)
+
+
+class NullAudio:
+    # Silent backend that still takes as long as the tone would
+    def __init__(self, sleep=None):
+        self.sleep = sleep
+
+    def beep(self, freq, duration_ms):
+        (self.sleep or time.sleep)(duration_ms / 1000)
+
+
+def default_audio():
+    return WinsoundAudio() if winsound else NullAudio()
+
+
+class Player:
+    def __init__(self, model=DEFAULT_TIMING, audio=None, sleep=None):
+        self.model = model
+        self.audio = audio or default_audio()
+        self.sleep = sleep  # Defaults to time.sleep, looked up at call time
+        self.index = None
+        self.position = 0
+
+    def play(self, morse_text, start_ms=0, is_active=None, on_element=None, on_progress=None):
+        # on_element(element, active) brackets every tone; on_progress(index, position)
+        # is called at each character/word gap and once at the end.
+        # Returns the position playback stopped at (len(morse_text) when complete).
+        model = self.model
+        self.index = index = timing_index(morse_text, model)
+        self.position = index.seek(start_ms)
+        while self.position < len(index):
+            if is_active and not is_active():
+                break
+
+            char = morse_text[self.position]
+            if char == '.' or char == '-':
+                freq, duration_ms = (model.dot_freq, model.dot_ms) if char == '.' else (model.dash_freq, model.dash_ms)
+                if on_element:
+                    on_element(char, True)
+                self.audio.beep(freq, duration_ms)
+                if on_element:
+                    on_element(char, False)
+                self._wait(model.element_gap_ms)
+            elif char == ' ' or char == '/':
+                if on_progress:
+                    on_progress(index, self.position + 1)
+                self._wait(model.char_gap_ms if char == ' ' else model.word_gap_ms)
+            self.position += 1
+
+        if on_progress:
+            on_progress(index, self.position)
+        return self.position
+
+    def remaining_ms(self):
+        return self.index.remaining_ms(self.position) if self.index else 0
+
+    def _wait(self, duration_ms):
+        (self.sleep or time.sleep)(duration_ms / 1000)
@@ -0,0 +1,371 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # Only used to speed up batch recording
+    np = None
+
+from player import Player
+from timing import DEFAULT_TIMING, TimingModel
+from translate import Batch, batch_inputs, join_batch
+
+# Append-only session log of everything encoded, decoded and played.
+#
+# The file is a header followed by length-prefixed records:
+#   EVENT   one translation or playback (input, output, table id, timing model)
+#   BATCH   one bulk translation: all inputs and outputs of an encode/decode_batch call
+#   INDEX   offsets of the events since the previous INDEX, plus a link back to it
+#   TRAILER offset of the last INDEX, written on close
+# Readers follow the TRAILER and the INDEX chain to seek to any event without
+# scanning; a log cut short (no TRAILER) is recovered with a linear scan.
+# SessionRecorder buffers records in memory and writes them in large chunks.
+
+MAGIC = b'MSLG'
+VERSION = 1
+
+EVENT, BATCH, INDEX, TRAILER = 1, 2, 3, 4
+KINDS = ('encode', 'decode', 'play')
+
+_FILE_HEADER = struct.Struct('<4sB')
+_RECORD_HEADER = struct.Struct('<BI')  # type, payload length
+_EVENT_HEAD = struct.Struct('<dBI7HII')  # timestamp, kind, table id, model, input/output bytes
+_BATCH_HEAD = struct.Struct('<dBI7HBIII')  # ... flags, count, input/output bytes
+_INDEX_HEAD = struct.Struct('<QQI')  # previous index offset, first event, count
+_TRAILER = struct.Struct('<Q')
+# Record header + EVENT head with the timing model pre-packed, so record() packs once
+_EVENT_RECORD = struct.Struct('<BIdBI14sII')
+_MODEL = struct.Struct('<7H')
+
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+_BATCH_INPUT_OFFSETS = 1  # Flag: inputs carry explicit offsets instead of NUL separators
+
+# input/output are strings, or lists of strings for BATCH events
+SessionEvent = namedtuple('SessionEvent', ['number', 'timestamp', 'kind', 'table_id', 'model', 'input', 'output'])
+
+
+class SessionRecorder:
+    def __init__(self, path, flush_bytes=1 << 16, index_interval=256, clock=None):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.index_interval = index_interval
+        self.clock = clock or time.time
+
+        self._buffer = bytearray()
+        self._model = self._packed_model = None
+        self._pending = []  # Offsets of events not yet covered by an INDEX
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with SessionLog(path) as log:
+                self.event_count = len(log)
+                self._last_index = log.last_index_offset
+                self._indexed = log.indexed_count
+                self._pending = log.offsets[log.indexed_count:]
+                end = log.end_offset
+            self._file = open(path, 'r+b')
+            self._file.truncate(end)  # Drop a partial record left by a crash
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+            self.event_count = 0
+            self._last_index = 0
+            self._indexed = 0
+        self._offset = self._file.tell()
+
+    def record(self, kind, input_text, output_text, table_id=0, model=DEFAULT_TIMING, timestamp=None):
+        # Hot path for per-message logging: one pack and one copy into the buffer
+        input_bytes = input_text.encode()
+        output_bytes = output_text.encode()
+        if model is not self._model:
+            self._model, self._packed_model = model, _MODEL.pack(*model[:7])
+        record = _EVENT_RECORD.pack(
+            EVENT, _EVENT_HEAD.size + len(input_bytes) + len(output_bytes),
+            self.clock() if timestamp is None else timestamp, _KIND_CODES[kind], table_id,
+            self._packed_model, len(input_bytes), len(output_bytes)
+        ) + input_bytes + output_bytes
+        pending = self._pending
+        pending.append(self._offset)
+        self._offset += len(record)
+        self.event_count += 1
+        buffer = self._buffer
+        buffer += record
+        if len(pending) >= self.index_interval or len(buffer) >= self.flush_bytes:
+            self._checkpoint()
+
+    def record_batch(self, kind, messages, offsets, buffer, table_id=0, model=DEFAULT_TIMING, timestamp=None):
+        # Record a whole encode_batch/decode_batch call as one event: messages are
+        # the inputs (a list, or the Batch from join_batch that was translated),
+        # (offsets, buffer) the result.
+        flags = 0
+        parts = []
+        if not isinstance(messages, Batch):
+            # Reuse the inputs the vectorized path already flattened
+            inputs = batch_inputs(offsets)
+            if inputs is not None and len(inputs.offsets) == len(messages) + 1:
+                messages = inputs
+        if not isinstance(messages, Batch):
+            input_bytes = '\0'.join(messages).encode('utf-8')
+            if _count_nul(input_bytes) != max(len(messages) - 1, 0):
+                messages = join_batch(messages)  # Some message contains NUL
+        if isinstance(messages, Batch):
+            # Store the flattened inputs as they are instead of joining them again
+            count = len(messages.offsets) - 1
+            flags = _BATCH_INPUT_OFFSETS
+            input_bytes = messages.buffer.encode('utf-8')
+            parts.append(_offsets_bytes(messages.offsets))
+        else:
+            count = len(messages)
+        output_bytes = buffer.encode('utf-8')
+        head = _BATCH_HEAD.pack(
+            self.clock() if timestamp is None else timestamp, _KIND_CODES[kind], table_id,
+            *model[:7], flags, count, len(input_bytes), len(output_bytes)
+        )
+        self._append(BATCH, [head] + parts + [input_bytes, _offsets_bytes(offsets), output_bytes])
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._pending:
+            self._write_index()
+        self._append_record(TRAILER, (_TRAILER.pack(self._last_index),))
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _append(self, record_type, parts):
+        self._pending.append(self._offset)
+        self._append_record(record_type, parts)
+        self.event_count += 1
+        self._checkpoint()
+
+    def _checkpoint(self):
+        if len(self._pending) >= self.index_interval:
+            self._write_index()
+        if len(self._buffer) >= self.flush_bytes:
+            self.flush()
+
+    def _append_record(self, record_type, parts):
+        length = sum(len(part) for part in parts)
+        if length >= self.flush_bytes:
+            # Large records (batches) go straight to the file instead of being copied
+            self.flush()
+            self._file.write(_RECORD_HEADER.pack(record_type, length))
+            for part in parts:
+                self._file.write(part)
+        else:
+            self._buffer += _RECORD_HEADER.pack(record_type, length)
+            for part in parts:
+                self._buffer += part
+        self._offset += _RECORD_HEADER.size + length
+
+    def _write_index(self):
+        offset = self._offset
+        head = _INDEX_HEAD.pack(self._last_index, self._indexed, len(self._pending))
+        self._append_record(INDEX, (head, _offsets_bytes(self._pending)))
+        self._last_index = offset
+        self._indexed += len(self._pending)
+        self._pending = []
+
+
+class SessionLog:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a session log")
+
+        self.offsets = self._read_index_chain()
+        if self.offsets is None:
+            self._scan()
+        else:
+            self.indexed_count = len(self.offsets)
+            self.end_offset = len(self._data)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, number):
+        if number < 0:
+            number += len(self.offsets)
+        return self._read_event(number, self.offsets[number])
+
+    def events(self, start=0, stop=None):
+        stop = len(self.offsets) if stop is None else min(stop, len(self.offsets))
+        for number in range(start, stop):
+            yield self._read_event(number, self.offsets[number])
+
+    def render(self, start=0, stop=None, player=None):
+        # Re-play the Morse of a range of events with each event's timing model.
+        # Returns the number of messages played.
+        if player is None:
+            player = Player()
+        original_model = player.model
+        played = 0
+        try:
+            for event in self.events(start, stop):
+                morse = event.output if event.kind == 'encode' else event.input
+                player.model = event.model
+                for message in (morse if isinstance(morse, list) else [morse]):
+                    player.play(message)
+                    played += 1
+        finally:
+            player.model = original_model
+        return played
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_index_chain(self):
+        # Follow the TRAILER back through the INDEX blocks. Returns None if the
+        # log doesn't end with a TRAILER or the chain doesn't cover every event,
+        # e.g. when a crashed log happens to end in bytes that look like one.
+        try:
+            return self._follow_index_chain()
+        except struct.error:  # Lengths that run past the end of the file
+            return None
+
+    def _follow_index_chain(self):
+        data = self._data
+        trailer_size = _RECORD_HEADER.size + _TRAILER.size
+        if len(data) < _FILE_HEADER.size + trailer_size:
+            return None
+        record_type, length = _RECORD_HEADER.unpack_from(data, len(data) - trailer_size)
+        if record_type != TRAILER or length != _TRAILER.size:
+            return None
+        (index_offset,) = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+        self.last_index_offset = index_offset
+
+        blocks = []
+        expected_first = None
+        limit = len(data) - trailer_size  # Each INDEX lies before the previous one read
+        while index_offset:
+            if not _FILE_HEADER.size <= index_offset < limit:
+                return None
+            record_type, length = _RECORD_HEADER.unpack_from(data, index_offset)
+            start = index_offset + _RECORD_HEADER.size
+            if record_type != INDEX or start + length > limit:
+                return None
+            prev, first, count = _INDEX_HEAD.unpack_from(data, start)
+            if length != _INDEX_HEAD.size + 8 * count:
+                return None
+            if expected_first is not None and first + count != expected_first:
+                return None
+            offsets, _ = _read_offsets(data, start + _INDEX_HEAD.size, count)
+            blocks.append(offsets)
+            expected_first = first
+            limit = index_offset
+            index_offset = prev
+        if expected_first not in (None, 0):
+            return None
+
+        result = array('Q')
+        for offsets in reversed(blocks):
+            result.extend(offsets)
+        return result
+
+    def _scan(self):
+        data = self._data
+        self.offsets = []
+        self.indexed_count = 0
+        self.last_index_offset = 0
+        position = _FILE_HEADER.size
+        while position + _RECORD_HEADER.size <= len(data):
+            record_type, length = _RECORD_HEADER.unpack_from(data, position)
+            if position + _RECORD_HEADER.size + length > len(data):
+                break  # Truncated record
+            if record_type in (EVENT, BATCH):
+                self.offsets.append(position)
+            elif record_type == INDEX:
+                self.last_index_offset = position
+                prev, first, count = _INDEX_HEAD.unpack_from(data, position + _RECORD_HEADER.size)
+                self.indexed_count = first + count
+            position += _RECORD_HEADER.size + length
+        self.end_offset = position
+
+    def _read_event(self, number, offset):
+        data = self._data
+        record_type, length = _RECORD_HEADER.unpack_from(data, offset)
+        position = offset + _RECORD_HEADER.size
+        if record_type == EVENT:
+            fields = _EVENT_HEAD.unpack_from(data, position)
+            timestamp, kind, table, model = fields[0], fields[1], fields[2], TimingModel(*fields[3:10])
+            input_len, output_len = fields[10:]
+            position += _EVENT_HEAD.size
+            input_text = data[position:position + input_len].decode('utf-8')
+            output_text = data[position + input_len:position + input_len + output_len].decode('utf-8')
+        elif record_type == BATCH:
+            fields = _BATCH_HEAD.unpack_from(data, position)
+            timestamp, kind, table, model = fields[0], fields[1], fields[2], TimingModel(*fields[3:10])
+            flags, count, input_len, output_len = fields[10:]
+            position += _BATCH_HEAD.size
+            input_offsets = None
+            if flags & _BATCH_INPUT_OFFSETS:
+                input_offsets, position = _read_offsets(data, position, count + 1)
+            joined = data[position:position + input_len].decode('utf-8')
+            position += input_len
+            output_offsets, position = _read_offsets(data, position, count + 1)
+            buffer = data[position:position + output_len].decode('utf-8')
+            if input_offsets is not None:
+                input_text = _split(input_offsets, joined)
+            else:
+                input_text = joined.split('\0') if count else []
+            output_text = _split(output_offsets, buffer)
+        else:
+            raise ValueError(f"No event at offset {offset}")
+        return SessionEvent(number, timestamp, KINDS[kind], table, model, input_text, output_text)
+
+
+def _count_nul(data):
+    if np is not None:
+        return int(np.count_nonzero(np.frombuffer(data, dtype=np.uint8) == 0))
+    return data.count(0)
+
+
+# Offsets are stored as little-endian u64
+
+def _offsets_bytes(offsets):
+    if hasattr(offsets, 'astype'):  # NumPy array from the vectorized batch path
+        if offsets.dtype == '<i8' and offsets.flags.c_contiguous:
+            return memoryview(offsets).cast('B')  # Same bytes as <u8 for offsets, no copy
+        return memoryview(offsets.astype('<u8')).cast('B')
+    packed = array('Q', offsets)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _read_offsets(data, position, count):
+    offsets = array('Q')
+    offsets.frombytes(data[position:position + 8 * count])
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets, position + 8 * count
+
+
+def _split(offsets, buffer):
+    return [buffer[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
@@ -1,14 +1,40 @@
 import unittest
 import tkinter as tk
 from unittest.mock import MagicMock, patch
-import sys
 import os
+import shutil
+import tempfile
 import time
-import threading
 
 # Assuming test_app.py and App.py are in the same directory (e.g., src/gui)
 # A direct import is sufficient when run with `python src/gui/test_app.py`
 from App import App
+from harness import headless_player
+from session_log import SessionLog, SessionRecorder
+from timing import timing_index
+from translate import MORSE_CODE_DICT, table_id
+
+# The widgets the App's logic touches
+APP_WIDGETS = ('status_var', 'encode_input', 'encode_output', 'decode_input', 'decode_output',
+               'dot_feedback', 'dash_feedback', 'key_button', 'progress_var', 'time_var')
+
+
+def headless_app(player, recorder=None):
+    # An App built without widgets (mocks stand in for them), so its logic runs
+    # without a display. root.after runs callbacks scheduled with no delay (the
+    # playback thread's UI updates) at once and drops timers like the keyer poll.
+    with patch.object(App, 'create_widgets'):
+        app = App(master=MagicMock(), player=player, recorder=recorder)
+    for name in APP_WIDGETS:
+        setattr(app, name, MagicMock())
+    app.root.after.side_effect = lambda ms, callback: callback() if ms == 0 else None
+    return app
+
+
+def wait_for_playback(app, timeout=2):
+    timeout_start = time.time()
+    while app.playback_active and time.time() - timeout_start < timeout:
+        time.sleep(0.01)
 
 class TestMorseCodeTranslator(unittest.TestCase):
 
@@ -16,7 +42,11 @@ class TestMorseCodeTranslator(unittest.TestCase):
     # We will manage the Tkinter event loop manually in tests using update()
     @classmethod
     def setUpClass(cls):
-        cls.root = tk.Tk()
+        try:
+            cls.root = tk.Tk()
+        except tk.TclError:  # Headless CI: translation and playback are covered by the other test modules
+            cls.root = None
+            raise unittest.SkipTest("No display available for Tkinter")
         cls.root.withdraw() # Hide the main window to prevent it from popping up during tests
         # We will NOT start a mainloop in a separate thread.
         # Tkinter operations will be driven by explicit cls.root.update() calls in tests.
@@ -30,8 +60,10 @@ class TestMorseCodeTranslator(unittest.TestCase):
 
 
     def setUp(self):
-        # Pass the shared Tkinter root to the App instance
-        self.app = App(master=self.root)
+        # Pass the shared Tkinter root to the App instance, with a player that
+        # runs on a fake clock and records beeps instead of playing them
+        self.player, self.clock, self.audio = headless_player()
+        self.app = App(master=self.root, player=self.player)
         
         # Reset playback_active for each test
         self.app.playback_active = False
@@ -117,11 +149,9 @@ class TestMorseCodeTranslator(unittest.TestCase):
         self.assertEqual(self.app.status_var.get(), "Error: No Morse code to decode")
         self.assertEqual(self.app.decode_output.get("1.0", tk.END).strip(), "")
 
-    # --- Test Sound Playback (Mocked) ---
-    # Patch winsound and time.sleep in the App module where they are used.
-    @patch('App.winsound.Beep')
-    @patch('App.time.sleep')
-    def test_play_encoded_sound_calls_beep(self, mock_sleep, mock_beep):
+    # --- Test Sound Playback (Fake clock, recording audio) ---
+
+    def test_play_encoded_sound_calls_beep(self):
         self.app.encode_input.insert(tk.END, "HI")
         self.app.encode_text() # Populate the output field with morse for "HI" (.... ..)
 
@@ -155,13 +185,11 @@ class TestMorseCodeTranslator(unittest.TestCase):
         self.assertTrue(playback_finished, 
                         f"Playback did not reach 'Playback finished' state. Current status: '{self.app.status_var.get()}', playback_active: {self.app.playback_active}")
 
-        # Assertions on mocked calls (should pass if the thread executed)
-        self.assertGreaterEqual(mock_beep.call_count, 6, "Not enough Beep calls for 'HI'.") # "HI" is 6 beeps
-        self.assertGreaterEqual(mock_sleep.call_count, 6, "Not enough sleep calls for 'HI'.") # At least 6 sleeps
+        # "HI" is 6 dots; playback took exactly as long as the timing model says
+        self.assertEqual([freq for _, freq, _ in self.audio.beeps], [800] * 6)
+        self.assertAlmostEqual(self.clock.now, 6 * 0.3 + 0.3)
 
-    @patch('App.winsound.Beep')
-    @patch('App.time.sleep')
-    def test_play_decoded_sound_calls_beep(self, mock_sleep, mock_beep):
+    def test_play_decoded_sound_calls_beep(self):
         self.app.decode_input.insert(tk.END, ".-") # Morse for 'A'
 
         self.app.play_decoded_sound()
@@ -194,9 +222,30 @@ class TestMorseCodeTranslator(unittest.TestCase):
         self.assertTrue(playback_finished, 
                         f"Playback did not reach 'Playback finished' state. Current status: '{self.app.status_var.get()}', playback_active: {self.app.playback_active}")
 
-        self.assertGreaterEqual(mock_beep.call_count, 2, "Not enough Beep calls for 'A'.") # ".-" means 2 beeps
-        self.assertGreaterEqual(mock_sleep.call_count, 1, "Not enough sleep calls for 'A'.") # At least 1 sleep for character separation
+        # ".-" means a dot then a dash
+        self.assertEqual([(freq, ms) for _, freq, ms in self.audio.beeps], [(800, 200), (600, 400)])
+        self.assertAlmostEqual(self.clock.now, 0.8)
+
 
+    def test_play_resets_progress(self):
+        self.app.decode_input.insert(tk.END, ".-")
+        for play in (self.app.play_encoded_sound, self.app.play_decoded_sound):
+            with self.subTest(play=play.__name__):
+                self.app.encode_output.config(state=tk.NORMAL)
+                self.app.encode_output.insert(tk.END, ".-")
+                self.app.encode_output.config(state=tk.DISABLED)
+                self.app.progress_var.set(1.0)
+                self.app.time_var.set("1.0s / 1.0s")
+
+                play()
+                # Reset before the thread starts, not via root.after
+                self.assertEqual(self.app.progress_var.get(), 0.0)
+                self.assertEqual(self.app.time_var.get(), "")
+
+                timeout_start = time.time()
+                while self.app.playback_active and time.time() - timeout_start < 2:
+                    time.sleep(0.01)
+                self.app.root.update()
 
     def test_play_sound_no_morse_code(self):
         # For encoded sound (output text area)
@@ -277,5 +326,125 @@ class TestMorseCodeTranslator(unittest.TestCase):
         self.app.decode_button.config.assert_any_call(bg="#4CAF50", relief=tk.SUNKEN)
         self.app.encode_button.config.assert_any_call(bg="#800000", relief=tk.RAISED)
 
+
+class TestHeadlessPlayback(unittest.TestCase):
+
+    def setUp(self):
+        self.player, self.clock, self.audio = headless_player()
+        self.app = headless_app(self.player)
+
+    def colours(self, button):
+        return [call.kwargs['bg'] for call in button.config.call_args_list]
+
+    def test_play_encoded_sound(self):
+        morse = ".... .."  # HI
+        self.app.encode_output.get.return_value = morse + "\n"
+        self.app.play_encoded_sound()
+        wait_for_playback(self.app)
+
+        self.assertFalse(self.app.playback_active)
+        self.assertEqual(self.app.status_var.set.call_args_list[-1].args, ("Playback finished",))
+        self.assertEqual([freq for _, freq, _ in self.audio.beeps], [800] * 6)
+        # Every tone lights the dot button and clears it; both are cleared at the end
+        active, idle = self.app.sound_active_color, self.app.bg_color
+        self.assertEqual(self.colours(self.app.dot_feedback), [active, idle] * 6 + [idle])
+        self.assertEqual(self.colours(self.app.dash_feedback), [idle])
+
+        # Reset when playback starts, then updated once per character
+        progress = [call.args[0] for call in self.app.progress_var.set.call_args_list]
+        self.assertEqual(progress[0], 0.0)
+        self.assertEqual(self.app.time_var.set.call_args_list[0].args, ("",))
+        self.assertEqual(progress[-1], 1.0)
+        self.assertEqual(progress, sorted(progress))
+        total = timing_index(morse).total_ms / 1000
+        self.assertEqual(self.app.time_var.set.call_args_list[-1].args, (f"{total:.1f}s / {total:.1f}s",))
+        self.assertEqual(self.app.playback_eta(), 0)
+
+    def test_play_decoded_sound(self):
+        self.app.decode_input.get.return_value = ".-\n"
+        self.app.play_decoded_sound()
+        wait_for_playback(self.app)
+
+        self.assertEqual([(freq, ms) for _, freq, ms in self.audio.beeps], [(800, 200), (600, 400)])
+        active, idle = self.app.sound_active_color, self.app.bg_color
+        self.assertEqual(self.colours(self.app.dot_feedback), [active, idle, idle])
+        self.assertEqual(self.colours(self.app.dash_feedback), [active, idle, idle])
+        self.assertEqual(self.app.status_var.set.call_args_list[-1].args, ("Playback finished",))
+
+    def test_close_stops_playback(self):
+        self.app.encode_output.get.return_value = "... --- ...\n"
+
+        def close_on_first_tone(bg):
+            if bg == self.app.sound_active_color:
+                self.app.on_close()
+        self.app.dot_feedback.config.side_effect = close_on_first_tone
+        self.app.play_encoded_sound()
+        wait_for_playback(self.app)
+
+        self.assertFalse(self.app.playback_active)
+        self.assertEqual(len(self.audio.beeps), 1)
+        self.assertEqual(self.app.status_var.set.call_args_list[-1].args, ("Playback finished",))
+        self.app.root.destroy.assert_called_once_with()
+
+
+class TestSessionRecording(unittest.TestCase):
+
+    # Recording only touches the recorder, keyer and player
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "session.mslog")
+        self.player, self.clock, self.audio = headless_player()
+        self.app = headless_app(self.player, SessionRecorder(self.path))
+        self.app.keyer.clock = self.clock
+
+    def tearDown(self):
+        self.app.recorder.close()
+        shutil.rmtree(self.tmpdir)
+
+    def read_log(self):
+        # The App closes the recorder on exit, so the log must open through
+        # its index chain rather than a scan
+        self.app.on_close()
+        with patch.object(SessionLog, '_scan', side_effect=AssertionError("log was scanned")):
+            with SessionLog(self.path) as log:
+                self.assertEqual(log.indexed_count, len(log))
+                return list(log.events())
+
+    def test_records_translations_and_playback(self):
+        self.app.encode_input.get.return_value = "sos\n"
+        self.app.encode_text()
+        self.app.decode_input.get.return_value = ".- / -...\n"
+        self.app.decode_morse()
+        self.app.encode_output.get.return_value = "... --- ...\n"
+        self.app.play_encoded_sound()
+        wait_for_playback(self.app)
+
+        events = self.read_log()
+        self.assertEqual([(e.kind, e.input, e.output) for e in events], [
+            ('encode', "SOS", "... --- ..."),
+            ('decode', ".- / -...", "A B"),
+            ('play', "... --- ...", ""),
+        ])
+        for event in events:
+            self.assertEqual(event.table_id, table_id(MORSE_CODE_DICT))
+            self.assertEqual(event.model, self.player.model)
+        self.assertEqual(len(self.audio.beeps), 9)
+
+    def test_records_keyed_input_once_idle(self):
+        dot = 1.2 / 15
+        for mark in (3 * dot, dot, 3 * dot):  # K
+            self.app.key_down()
+            self.clock.advance(mark)
+            self.app.key_up()
+            self.clock.advance(dot)
+        self.app._poll_keyer()
+        self.assertTrue(self.app.keying_active)
+
+        self.clock.advance(3.5)
+        self.app._poll_keyer()
+        self.assertFalse(self.app.keying_active)
+        events = self.read_log()
+        self.assertEqual([(e.kind, e.input, e.output) for e in events], [('decode', "-.-", "K")])
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import unittest
+
+from keyer import Keyer, decode_timings
+
+REVERSE_MORSE = {
+    '...': 'S', '---': 'O', '....': 'H', '..': 'I', '.': 'E', '-': 'T',
+    '.-': 'A', '-.-.': 'C', '-.-': 'K', '.----': '1', '/': ' '
+}
+
+
+def make_trace(morse, wpm, start=0.0, jitter=None):
+    # Build (timestamp, is_down) events for a Morse string at standard timing.
+    # jitter, if given, is a list of multipliers applied to successive durations.
+    dot = 1.2 / wpm
+    t = start
+    events = []
+    factors = iter(jitter or [])
+    pending_gap = 0.0
+    for symbol in morse:
+        if symbol in '.-':
+            t += pending_gap * next(factors, 1.0)
+            events.append((t, True))
+            t += (dot if symbol == '.' else 3 * dot) * next(factors, 1.0)
+            events.append((t, False))
+            pending_gap = dot
+        elif symbol == ' ':
+            pending_gap = max(pending_gap, 3 * dot)
+        elif symbol == '/':
+            pending_gap = 7 * dot
+    return events
+
+
+def key_in_real_time(events, reverse_dict, poll_every=0.01):
+    # Replay a trace through a Keyer on a fake clock, polling like the App does
+    now = [0.0]
+    keyer = Keyer(reverse_dict, clock=lambda: now[0])
+    events = list(events)
+    end = events[-1][0] + 1.0
+    while now[0] < end:
+        while events and events[0][0] <= now[0]:
+            t, is_down = events.pop(0)
+            keyer.press(t) if is_down else keyer.release(t)
+        keyer.poll()
+        now[0] += poll_every
+    return keyer.finish().rstrip(), keyer.wpm
+
+
+class TestKeyer(unittest.TestCase):
+
+    def test_decode_timings(self):
+        test_cases = [
+            ("... --- ...", "SOS"),
+            (".... ..", "HI"),
+            (".... .. / - .... .", "HI THE"),
+            ("-.-. --.-", "C--.-"),  # Unknown codes are kept as-is
+        ]
+        for morse, expected in test_cases:
+            with self.subTest(morse=morse):
+                self.assertEqual(decode_timings(make_trace(morse, 15), REVERSE_MORSE), expected)
+
+    def test_adapts_to_speed(self):
+        # Seeded at 15 WPM, keyed at 30 WPM: the estimate should converge
+        morse = " / ".join(["... --- ..."] * 5)
+        keyer = Keyer(REVERSE_MORSE, initial_wpm=15)
+        for t, is_down in make_trace(morse, 30):
+            keyer.press(t) if is_down else keyer.release(t)
+        self.assertEqual(keyer.finish(), "SOS SOS SOS SOS SOS")
+        self.assertAlmostEqual(keyer.wpm, 30, delta=2)
+
+    def test_dash_first_at_high_speed(self):
+        # Seeded at the default 15 WPM; the opening dashes must not be read as dots
+        test_cases = [
+            ("--- ... ---", 25, "OSO"),
+            ("--- ... --- / - . ... -", 30, "OSO TEST"),
+            ("--.- .-. ...- / --.- .-. ...-", 35, "QRV QRV"),
+            ("- . / . -", 40, "TE ET"),
+        ]
+        reverse = dict(REVERSE_MORSE, **{'--.-': 'Q', '.-.': 'R', '...-': 'V'})
+        for morse, wpm, expected in test_cases:
+            with self.subTest(morse=morse, wpm=wpm):
+                self.assertEqual(decode_timings(make_trace(morse, wpm), reverse), expected)
+
+    def test_dashes_only(self):
+        # No dot has been keyed, so nothing shows the dashes are three units;
+        # the estimate must not collapse onto them
+        for morse, expected in (("- - -", "TTT"), ("- / -", "T T")):
+            for wpm in (15, 25):
+                with self.subTest(morse=morse, wpm=wpm):
+                    trace = make_trace(morse, wpm)
+                    self.assertEqual(decode_timings(trace, REVERSE_MORSE), expected)
+                    text, estimate = key_in_real_time(trace, REVERSE_MORSE)
+                    self.assertEqual(text, expected)
+                    self.assertAlmostEqual(estimate, wpm, delta=1)
+
+    def test_ignores_contact_bounce(self):
+        trace = make_trace("... --- ...", 15)
+        (down, _), (up, _) = trace[:2]
+        test_cases = [
+            [(down - 0.006, True), (down - 0.002, False)] + trace,                 # Before a mark
+            trace[:1] + [(down + 0.03, False), (down + 0.034, True)] + trace[1:],  # During a mark
+            trace[:2] + [(up + 0.003, True), (up + 0.007, False)] + trace[2:],     # After a mark
+        ]
+        for events in test_cases:
+            with self.subTest(events=events[:4]):
+                self.assertEqual(decode_timings(events, REVERSE_MORSE), "SOS")
+                self.assertEqual(key_in_real_time(events, REVERSE_MORSE)[0], "SOS")
+
+    def test_recovers_after_slowing_down(self):
+        fast = make_trace("--- ... --- / - . ... -", 30)
+        slow = make_trace("... --- ... / ... --- ...", 12, start=fast[-1][0] + 7 * 1.2 / 30)
+        text = decode_timings(fast + slow, REVERSE_MORSE)
+        self.assertTrue(text.startswith("OSO TEST "), text)
+        self.assertTrue(text.endswith(" SOS"), text)
+
+    def test_tolerates_jitter(self):
+        jitter = [1.0, 1.25, 0.8, 1.2, 0.85, 1.1, 0.9] * 10
+        self.assertEqual(decode_timings(make_trace("... --- ... / .- -.-", 20, jitter=jitter), REVERSE_MORSE), "SOS AK")
+
+    def test_character_emitted_before_next_press(self):
+        # The character must be available within one character time of the
+        # last element being released, without waiting for more input.
+        now = [0.0]
+        chars = []
+        keyer = Keyer(REVERSE_MORSE, on_char=chars.append, clock=lambda: now[0], initial_wpm=20)
+        dot = 1.2 / 20
+        for t, is_down in make_trace("...", 20):
+            now[0] = t
+            keyer.press() if is_down else keyer.release()
+        released = now[0]
+        while not chars:
+            now[0] += 0.005
+            keyer.poll()
+        self.assertEqual(chars, ['S'])
+        self.assertLess(now[0] - released, 3 * dot)
+
+    def test_word_space_emitted_once(self):
+        chars = []
+        keyer = Keyer(REVERSE_MORSE, on_char=chars.append, initial_wpm=20)
+        keyer.press(0.0)
+        keyer.release(0.06)
+        keyer.poll(1.0)
+        keyer.poll(2.0)
+        keyer.press(3.0)
+        keyer.release(3.06)
+        self.assertEqual(keyer.finish(), "E E")
+        self.assertEqual(chars, ['E', ' ', 'E'])
+
+    def test_elements_reported(self):
+        elements = []
+        keyer = Keyer(REVERSE_MORSE, on_element=elements.append, initial_wpm=15)
+        for t, is_down in make_trace(".-", 15):
+            keyer.press(t) if is_down else keyer.release(t)
+        self.assertEqual(elements, ['.', '-'])
+
+    def test_ignores_repeat_and_stray_release(self):
+        keyer = Keyer(REVERSE_MORSE, initial_wpm=15)
+        keyer.release(0.0)
+        keyer.press(0.1)
+        keyer.press(0.12)  # Auto-repeat
+        keyer.release(0.18)
+        self.assertEqual(keyer.finish(), "E")
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
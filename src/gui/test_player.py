@@ -0,0 +1,80 @@
+import time
+import unittest
+
+from harness import FakeClock, RecordingAudio, headless_player
+from player import NullAudio, Player
+from timing import TimingModel, timing_index
+from translate import MORSE_CODE_DICT, encode_message
+
+
+class TestPlayer(unittest.TestCase):
+
+    def test_plays_elements_in_order(self):
+        player, clock, audio = headless_player()
+        self.assertEqual(player.play("-. /.."), 6)
+        self.assertEqual(audio.beeps, [
+            (0.0, 600, 400), (0.5, 800, 200),
+            (1.8, 800, 200), (2.1, 800, 200),
+        ])
+        self.assertEqual(clock.now, 2.4)
+
+    def test_one_hour_playback_runs_on_fake_clock(self):
+        morse = encode_message("PARIS " * 1000, MORSE_CODE_DICT)
+        player, clock, audio = headless_player()
+        started = time.perf_counter()
+        player.play(morse)
+        elapsed = time.perf_counter() - started
+
+        self.assertGreater(clock.now, 3600)
+        self.assertEqual(round(clock.now * 1000), timing_index(morse).total_ms)
+        self.assertEqual(len(audio.beeps), morse.count('.') + morse.count('-'))
+        self.assertLess(elapsed, 1.0)
+
+    def test_start_offset_and_progress(self):
+        player, clock, audio = headless_player()
+        progress = []
+        morse = "... --- ..."
+        start_ms = timing_index(morse).char_start(1)
+        player.play(morse, start_ms=start_ms, on_progress=lambda index, position: progress.append(index.progress(position)))
+        self.assertEqual([freq for _, freq, _ in audio.beeps], [600] * 3 + [800] * 3)
+        self.assertEqual(round(clock.now * 1000), timing_index(morse).total_ms - start_ms)
+        self.assertEqual(progress[-1], 1.0)
+        self.assertEqual(progress, sorted(progress))
+
+    def test_stops_when_inactive(self):
+        player, clock, audio = headless_player()
+        position = player.play("......", is_active=lambda: len(audio.beeps) < 2)
+        self.assertEqual(position, 2)
+        self.assertEqual(player.remaining_ms(), 4 * 300)
+
+    def test_element_callbacks_bracket_beeps(self):
+        player, clock, audio = headless_player()
+        events = []
+        player.play(".-", on_element=lambda element, active: events.append((element, active, len(audio.beeps))))
+        self.assertEqual(events, [('.', True, 0), ('.', False, 1), ('-', True, 1), ('-', False, 2)])
+
+    def test_custom_model(self):
+        model = TimingModel(50, 150, 50, 100, 300, 700, 700)
+        player, clock, audio = headless_player(model)
+        player.play(".- .")
+        self.assertEqual(round(clock.now * 1000), 100 + 200 + 100 + 100)
+        self.assertEqual({freq for _, freq, _ in audio.beeps}, {700})
+
+    def test_null_audio_takes_tone_time(self):
+        clock = FakeClock()
+        player = Player(audio=NullAudio(sleep=clock.sleep), sleep=clock.sleep)
+        player.play("-")
+        self.assertEqual(clock.now, 0.5)
+
+    def test_fake_clock_is_exact(self):
+        clock = FakeClock()
+        for _ in range(100000):
+            clock.sleep(0.1)
+        self.assertEqual(clock.now, 10000.0)
+        recorder = RecordingAudio(clock)
+        recorder.beep(800, 200)
+        self.assertEqual(clock(), 10000.2)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
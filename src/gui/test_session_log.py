@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import translate
+from harness import headless_player
+from session_log import SessionLog, SessionRecorder
+from timing import DEFAULT_TIMING, TimingModel, timing_index
+from translate import MORSE_CODE_DICT, encode_batch, encode_message, join_batch, table_id
+
+FAST = TimingModel(60, 180, 60, 120, 360, 700, 700)
+
+
+class TestSessionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "session.mslog")
+        self.ticks = iter(range(1, 10 ** 6))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def recorder(self, **kwargs):
+        return SessionRecorder(self.path, clock=lambda: float(next(self.ticks)), **kwargs)
+
+    def test_round_trip(self):
+        tid = table_id(MORSE_CODE_DICT)
+        with self.recorder() as recorder:
+            recorder.record('encode', "SOS", "... --- ...", tid)
+            recorder.record('decode', ".- / ¿", "A ¿", tid, FAST)
+            recorder.record('play', "... --- ...", "")
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(len(log), 3)
+            first, second, third = log.events()
+            self.assertEqual(first, (0, 1.0, 'encode', tid, DEFAULT_TIMING, "SOS", "... --- ..."))
+            self.assertEqual(second, (1, 2.0, 'decode', tid, FAST, ".- / ¿", "A ¿"))
+            self.assertEqual(third.kind, 'play')
+            self.assertEqual(log[-1], third)
+
+    def test_seek_through_index_blocks(self):
+        with self.recorder(index_interval=16, flush_bytes=256) as recorder:
+            for i in range(1000):
+                recorder.record('encode', str(i), encode_message(str(i), MORSE_CODE_DICT))
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(log.indexed_count, 1000)
+            for number in (0, 15, 16, 517, 999):
+                self.assertEqual(log[number].input, str(number))
+            self.assertEqual([e.input for e in log.events(998, 2000)], ["998", "999"])
+
+    def test_batch_events(self):
+        messages = ["CQ", "K1ABC", "", "nul\0inside"]
+        offsets, buffer = encode_batch(messages, MORSE_CODE_DICT)
+        with self.recorder() as recorder:
+            recorder.record_batch('encode', messages[:3], offsets[:4], buffer[:offsets[3]])
+            recorder.record_batch('encode', messages, offsets, buffer)
+            recorder.record_batch('decode', [], [0], "")
+
+        with SessionLog(self.path) as log:
+            expected = [encode_message(m, MORSE_CODE_DICT) for m in messages]
+            self.assertEqual(log[0].input, messages[:3])
+            self.assertEqual(log[0].output, expected[:3])
+            self.assertEqual(log[1].input, messages)
+            self.assertEqual(log[1].output, expected)
+            self.assertEqual((log[2].input, log[2].output), ([], []))
+
+    @unittest.skipIf(translate.np is None, "NumPy not installed")
+    def test_batch_events_reuse_flattened_inputs(self):
+        messages = ["CQ", "", "K1ABC"]
+        offsets, buffer = encode_batch(messages, MORSE_CODE_DICT)
+        with self.recorder() as recorder:
+            with patch('session_log._count_nul', side_effect=AssertionError("inputs joined again")):
+                recorder.record_batch('encode', messages, offsets, buffer)
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(log[0].input, messages)
+            self.assertEqual(log[0].output, [encode_message(m, MORSE_CODE_DICT) for m in messages])
+
+    def test_batch_events_from_joined_inputs(self):
+        messages = ["CQ", "", "¿K1ABC?"]
+        batch = join_batch(messages)
+        offsets, buffer = encode_batch(batch, MORSE_CODE_DICT)
+        with self.recorder() as recorder:
+            recorder.record_batch('encode', batch, offsets, buffer)
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(log[0].input, messages)
+            self.assertEqual(log[0].output, [encode_message(m, MORSE_CODE_DICT) for m in messages])
+
+    def test_append_after_reopen(self):
+        with self.recorder(index_interval=4) as recorder:
+            for i in range(10):
+                recorder.record('play', str(i), "")
+        with self.recorder(index_interval=4) as recorder:
+            self.assertEqual(recorder.event_count, 10)
+            for i in range(10, 15):
+                recorder.record('play', str(i), "")
+
+        with SessionLog(self.path) as log:
+            self.assertEqual([e.input for e in log.events()], [str(i) for i in range(15)])
+            self.assertEqual(log.indexed_count, 15)
+
+    def test_recovers_truncated_log(self):
+        recorder = self.recorder(index_interval=4, flush_bytes=0)
+        for i in range(10):
+            recorder.record('encode', str(i), "x" * 20)
+        recorder.flush()
+        # Simulate a crash: no trailer, and half of the last record written
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+        recorder._file.close()
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(len(log), 9)
+            self.assertEqual(log.indexed_count, 8)
+
+        with self.recorder(index_interval=4) as recorder:
+            recorder.record('encode', "9", "again")
+        with SessionLog(self.path) as log:
+            self.assertEqual([e.input for e in log.events()], [str(i) for i in range(10)])
+            self.assertEqual(log.indexed_count, 10)
+
+    def test_recovers_log_ending_in_trailer_lookalike(self):
+        # A crashed log whose last event happens to end in bytes that parse as
+        # a TRAILER pointing past the end of the file
+        lookalike = '\x04\x08\x00\x00\x00' + '\x7f\x7f' + '\x00' * 6
+        recorder = self.recorder(index_interval=4)
+        for i in range(5):
+            recorder.record('encode', str(i), "x")
+        recorder.record('encode', "5", lookalike)
+        recorder.flush()
+        recorder._file.close()
+
+        with SessionLog(self.path) as log:
+            self.assertEqual(len(log), 6)
+            self.assertEqual(log.indexed_count, 4)
+            self.assertEqual(log[5].output, lookalike)
+
+        with self.recorder(index_interval=4) as recorder:
+            recorder.record('encode', "6", "again")
+        with SessionLog(self.path) as log:
+            self.assertEqual([e.input for e in log.events()], [str(i) for i in range(7)])
+            self.assertEqual(log.indexed_count, 7)
+
+    def test_render_range(self):
+        with self.recorder() as recorder:
+            recorder.record('encode', "E", ".")
+            recorder.record('decode', "- -", "T T", model=FAST)
+            recorder.record_batch('encode', ["E", "I"], [0, 1, 3], "...")
+
+        player, clock, audio = headless_player()
+        with SessionLog(self.path) as log:
+            self.assertEqual(log.render(1, 3, player), 3)
+        expected_ms = timing_index("- -", FAST).total_ms + timing_index(".").total_ms + timing_index("..").total_ms
+        self.assertEqual(round(clock.now * 1000), expected_ms)
+        self.assertEqual([freq for _, freq, _ in audio.beeps], [700, 700, 800, 800, 800])
+        self.assertEqual(player.model, DEFAULT_TIMING)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"not a log")
+        with self.assertRaises(ValueError):
+            SessionLog(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from timing import (DEFAULT_TIMING, TimingIndex, TimingModel, timing_index,
+                    total_duration_ms, queue_duration_ms)
+
+
+def walk_duration(morse_text, model=DEFAULT_TIMING):
+    # What _play_morse_sound spends on each symbol, walked one at a time
+    total = 0
+    for char in morse_text:
+        if char == '.':
+            total += model.dot_ms + model.element_gap_ms
+        elif char == '-':
+            total += model.dash_ms + model.element_gap_ms
+        elif char == ' ':
+            total += model.char_gap_ms
+        elif char == '/':
+            total += model.word_gap_ms
+    return total
+
+
+class TestTimingIndex(unittest.TestCase):
+
+    def test_offsets(self):
+        index = TimingIndex(".- /  -")
+        self.assertEqual(index.starts, [0, 300, 800, 1100, 1800, 2100, 2400, 2900])
+        self.assertEqual(index.total_ms, 2900)
+        self.assertEqual(index.char_positions, [0, 6])
+        self.assertEqual(index.char_start(1), 2400)
+
+    def test_seek(self):
+        index = TimingIndex("... ---")
+        self.assertEqual(index.seek(0), 0)
+        self.assertEqual(index.seek(299), 0)
+        self.assertEqual(index.seek(300), 1)
+        self.assertEqual(index.seek(950), 3)  # In the character gap
+        self.assertEqual(index.seek(10 ** 6), len(index))
+        self.assertEqual(index.char_at(950), 0)
+        self.assertEqual(index.char_at(1200), 1)
+
+    def test_progress_and_remaining(self):
+        index = TimingIndex(".-")
+        self.assertEqual(index.progress(0), 0.0)
+        self.assertEqual(index.progress(1), 300 / 800)
+        self.assertEqual(index.progress(2), 1.0)
+        self.assertEqual(index.remaining_ms(1), 500)
+        self.assertEqual(TimingIndex("").progress(0), 1.0)
+
+    def test_totals_match_walking_the_message(self):
+        rng = random.Random(0)
+        model = TimingModel(60, 180, 60, 120, 360, 700, 700)
+        for _ in range(50):
+            morse = ''.join(rng.choice(".- /x") for _ in range(rng.randint(0, 300)))
+            with self.subTest(morse=morse):
+                self.assertEqual(TimingIndex(morse).total_ms, walk_duration(morse))
+                self.assertEqual(TimingIndex(morse, model).total_ms, walk_duration(morse, model))
+                self.assertEqual(total_duration_ms(morse), walk_duration(morse))
+
+    def test_queue_duration(self):
+        queue = ["... --- ...", ".- / -...", ""] * 1000
+        self.assertEqual(queue_duration_ms(queue), sum(walk_duration(m) for m in queue))
+
+    def test_index_is_cached(self):
+        self.assertIs(timing_index("-- ..."), timing_index("-- ..."))
+        self.assertIsNot(timing_index("-- ..."), timing_index("-- ...", TimingModel(1, 3, 1, 2, 6, 800, 600)))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,173 @@
+import random
+import unittest
+from unittest.mock import patch
+
+import translate
+from translate import (MORSE_CODE_DICT, encode_message, decode_message,
+                       encode_batch, decode_batch, join_batch, split_batch, batch_inputs)
+
+REVERSE_MORSE_DICT = {v: k for k, v in MORSE_CODE_DICT.items()}
+
+
+def random_callsigns(count, seed=0):
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789/abc "
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 9))) for _ in range(count)]
+
+
+class TestTranslate(unittest.TestCase):
+
+    def test_encode_message(self):
+        self.assertEqual(encode_message("SOS", MORSE_CODE_DICT), "... --- ...")
+        self.assertEqual(encode_message("a b", MORSE_CODE_DICT), ".- / -...")
+        self.assertEqual(encode_message("A#", MORSE_CODE_DICT), ".- #")  # Unsupported kept as-is
+
+    def test_decode_message(self):
+        self.assertEqual(decode_message("... --- ...", REVERSE_MORSE_DICT), "S O S")
+        self.assertEqual(decode_message(".- / -...", REVERSE_MORSE_DICT), "A B")
+        self.assertEqual(decode_message(".... XXX //", REVERSE_MORSE_DICT), "H XXX")
+
+    def test_batch_fallback_matches_per_message(self):
+        messages = random_callsigns(500)
+        offsets, buffer = encode_batch(messages, MORSE_CODE_DICT, use_numpy=False)
+        self.assertEqual(split_batch(offsets, buffer), [encode_message(m, MORSE_CODE_DICT) for m in messages])
+
+        morse = split_batch(offsets, buffer)
+        offsets, buffer = decode_batch(iter(morse), REVERSE_MORSE_DICT, use_numpy=False)
+        self.assertEqual(split_batch(offsets, buffer), [decode_message(m, REVERSE_MORSE_DICT) for m in morse])
+
+    def test_batch_accepts_joined_messages(self):
+        messages = random_callsigns(500, seed=4) + ["Å"]
+        expected = [encode_message(m, MORSE_CODE_DICT) for m in messages]
+        batch = join_batch(messages)
+        self.assertEqual(split_batch(list(batch.offsets), batch.buffer), messages)
+        for use_numpy in (None, False):
+            with self.subTest(use_numpy=use_numpy):
+                offsets, buffer = encode_batch(batch, MORSE_CODE_DICT, use_numpy=use_numpy)
+                self.assertEqual(split_batch(list(offsets), buffer), expected)
+                morse = encode_batch(messages[:-1], MORSE_CODE_DICT, use_numpy=use_numpy)
+                offsets, buffer = decode_batch(morse, REVERSE_MORSE_DICT, use_numpy=use_numpy)
+                self.assertEqual(split_batch(list(offsets), buffer),
+                                 [decode_message(m, REVERSE_MORSE_DICT) for m in expected[:-1]])
+
+
+class TestRoundTripProperties(unittest.TestCase):
+    # Seeded random inputs stand in for a property-based testing library.
+    # '6' shares its code with '-', so it decodes as '-' and is left out.
+    ALPHABET = ''.join(sorted(set(MORSE_CODE_DICT) - {'6', ' '}))
+
+    def random_text(self, rng, length):
+        return ''.join(rng.choice(self.ALPHABET + self.ALPHABET.lower() + '  ') for _ in range(length))
+
+    def test_decode_inverts_encode(self):
+        rng = random.Random(29)
+        for _ in range(200):
+            text = self.random_text(rng, rng.randint(0, 2000))
+            decoded = decode_message(encode_message(text, MORSE_CODE_DICT), REVERSE_MORSE_DICT)
+            # Word breaks decode to single spaces, like character breaks
+            self.assertEqual(decoded.split(' '), list(text.upper().replace(' ', '')) or [''])
+
+    def test_encode_output_is_parseable(self):
+        rng = random.Random(30)
+        for _ in range(200):
+            text = self.random_text(rng, rng.randint(1, 500))
+            morse = encode_message(text, MORSE_CODE_DICT)
+            self.assertTrue(set(morse) <= set('.-/ '))
+            self.assertEqual(len(morse.split(' ')), len(text))
+
+    def test_batch_matches_per_message_on_large_input(self):
+        rng = random.Random(31)
+        texts = [self.random_text(rng, rng.randint(0, 40)) for _ in range(20000)]
+        offsets, buffer = encode_batch(texts, MORSE_CODE_DICT)
+        morse = split_batch(list(offsets), buffer)
+        self.assertEqual(morse, [encode_message(t, MORSE_CODE_DICT) for t in texts])
+        offsets, buffer = decode_batch(morse, REVERSE_MORSE_DICT)
+        self.assertEqual(split_batch(list(offsets), buffer), [decode_message(m, REVERSE_MORSE_DICT) for m in morse])
+
+
+@unittest.skipIf(translate.np is None, "NumPy not installed")
+class TestTranslateNumpy(unittest.TestCase):
+
+    def assertBatchEqual(self, result, expected):
+        offsets, buffer = result
+        self.assertEqual(len(offsets), len(expected) + 1)
+        self.assertEqual(split_batch(list(offsets), buffer), expected)
+
+    def test_encode_batch_variable_length(self):
+        messages = random_callsigns(2000, seed=1) + ["", "   ", "A#~"]
+        expected = [encode_message(m, MORSE_CODE_DICT) for m in messages]
+        self.assertBatchEqual(encode_batch(messages, MORSE_CODE_DICT, use_numpy=True), expected)
+
+    def test_encode_batch_fixed_width_arrays(self):
+        messages = random_callsigns(2000, seed=2)
+        expected = [encode_message(m, MORSE_CODE_DICT) for m in messages]
+        np = translate.np
+        self.assertBatchEqual(encode_batch(np.array(messages), MORSE_CODE_DICT), expected)
+        self.assertBatchEqual(encode_batch(np.array(messages, dtype='S'), MORSE_CODE_DICT), expected)
+        self.assertBatchEqual(encode_batch(np.array(messages).reshape(40, 50), MORSE_CODE_DICT), expected)
+
+    def test_decode_batch(self):
+        messages = [encode_message(m, MORSE_CODE_DICT) for m in random_callsigns(2000, seed=3)]
+        messages += ["", " / ", "...   ---\t...", "//.-//"]
+        expected = [decode_message(m, REVERSE_MORSE_DICT) for m in messages]
+        self.assertBatchEqual(decode_batch(messages, REVERSE_MORSE_DICT, use_numpy=True), expected)
+        self.assertBatchEqual(decode_batch(translate.np.array(messages), REVERSE_MORSE_DICT), expected)
+
+    def test_tokens_do_not_cross_messages(self):
+        expected = ["E", "T", "A"]
+        self.assertBatchEqual(decode_batch([".", "-", ".-"], REVERSE_MORSE_DICT), expected)
+
+    def test_falls_back_for_unsupported_input(self):
+        test_cases = [
+            ["... XXX ...", "..."],          # Unknown token
+            ["........." , "."],             # Longer than the lookup table
+            [".- ·", ".-"],                  # Non-ASCII
+        ]
+        for messages in test_cases:
+            with self.subTest(messages=messages):
+                expected = [decode_message(m, REVERSE_MORSE_DICT) for m in messages]
+                self.assertBatchEqual(decode_batch(messages, REVERSE_MORSE_DICT), expected)
+        messages = ["ÅB", "C"]
+        expected = [encode_message(m, MORSE_CODE_DICT) for m in messages]
+        self.assertBatchEqual(encode_batch(messages, MORSE_CODE_DICT), expected)
+        # Non-ASCII bytes: UTF-8, or Latin-1 when they aren't valid UTF-8
+        expected = [encode_message(m, MORSE_CODE_DICT) for m in ["Å", "C", "\xff"]]
+        self.assertBatchEqual(encode_batch(translate.np.array(["Å".encode(), b"C"], dtype='S'), MORSE_CODE_DICT),
+                              expected[:2])
+        self.assertBatchEqual(encode_batch(["Å".encode(), b"C", b"\xff"], MORSE_CODE_DICT), expected)
+        self.assertBatchEqual(decode_batch([".- ·".encode(), b"..."], REVERSE_MORSE_DICT),
+                              [decode_message(m, REVERSE_MORSE_DICT) for m in [".- ·", "..."]])
+
+    def test_batch_inputs_kept_with_result(self):
+        messages = random_callsigns(100, seed=6)
+        offsets, _ = encode_batch(messages, MORSE_CODE_DICT)
+        inputs = batch_inputs(offsets)
+        self.assertEqual(split_batch(list(inputs.offsets), inputs.buffer), messages)
+        morse = [encode_message(m, MORSE_CODE_DICT) for m in messages] + ["... XXX"]
+        self.assertEqual(split_batch(*batch_inputs(decode_batch(morse, REVERSE_MORSE_DICT).offsets)), morse)
+
+        # Nothing is kept when the inputs weren't flattened as they are
+        self.assertIsNone(batch_inputs(encode_batch(messages, MORSE_CODE_DICT, use_numpy=False).offsets))
+        self.assertIsNone(batch_inputs(encode_batch(join_batch(messages), MORSE_CODE_DICT).offsets))
+        self.assertIsNone(batch_inputs(decode_batch([".- ·"], REVERSE_MORSE_DICT).offsets))
+        self.assertIsNone(batch_inputs(list(offsets)))
+
+        # and the inputs go with the result
+        key = id(offsets)
+        del offsets
+        self.assertNotIn(key, translate._flattened_inputs)
+
+    def test_decodes_only_bad_messages_per_message(self):
+        messages = [encode_message(m, MORSE_CODE_DICT) for m in random_callsigns(2000, seed=5)]
+        bad = {3: "... XXX ...", 4: "", 500: "........." + " .-", 1999: ".- · -"}
+        for i, message in bad.items():
+            messages[i] = message
+        expected = [decode_message(m, REVERSE_MORSE_DICT) for m in messages]
+        with patch('translate.decode_message', wraps=decode_message) as per_message:
+            self.assertBatchEqual(decode_batch(messages, REVERSE_MORSE_DICT, use_numpy=True), expected)
+        self.assertEqual(sorted(call.args[0] for call in per_message.call_args_list),
+                         sorted(m for m in bad.values() if m))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
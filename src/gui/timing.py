@@ -0,0 +1,89 @@
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import accumulate
+
+# Playback timing without playing.
+#
+# A TimingIndex holds the cumulative start offset (in milliseconds) of every
+# symbol of a Morse string, built in a single pass. Seeking, progress and ETA
+# are then bisections/lookups instead of a walk over the message.
+
+# Durations in milliseconds and tone frequencies in Hz. Each dot/dash is
+# followed by element_gap; ' ' and '/' add char_gap and word_gap on top.
+TimingModel = namedtuple(
+    'TimingModel',
+    ['dot_ms', 'dash_ms', 'element_gap_ms', 'char_gap_ms', 'word_gap_ms', 'dot_freq', 'dash_freq']
+)
+
+DEFAULT_TIMING = TimingModel(
+    dot_ms=200, dash_ms=400, element_gap_ms=100, char_gap_ms=300, word_gap_ms=700,
+    dot_freq=800, dash_freq=600
+)
+
+_CHARACTER = re.compile(r'[.-]+')
+
+
+def symbol_durations(model=DEFAULT_TIMING):
+    return {
+        '.': model.dot_ms + model.element_gap_ms,
+        '-': model.dash_ms + model.element_gap_ms,
+        ' ': model.char_gap_ms,
+        '/': model.word_gap_ms,
+    }
+
+
+class TimingIndex:
+    def __init__(self, morse_text, model=DEFAULT_TIMING):
+        self.text = morse_text
+        self.model = model
+        durations = symbol_durations(model)
+        # starts[i] is when symbol i begins; starts[-1] is the total duration.
+        # Symbols other than '.', '-', ' ' and '/' take no time.
+        self.starts = list(accumulate((durations.get(symbol, 0) for symbol in morse_text), initial=0))
+        # Symbol index of the first element of every Morse character
+        self.char_positions = [match.start() for match in _CHARACTER.finditer(morse_text)]
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def total_ms(self):
+        return self.starts[-1]
+
+    def start_of(self, position):
+        return self.starts[position]
+
+    def char_start(self, char_number):
+        return self.starts[self.char_positions[char_number]]
+
+    def seek(self, offset_ms):
+        # Index of the symbol playing at offset_ms (len(self) once finished)
+        if offset_ms >= self.total_ms:
+            return len(self.text)
+        return max(bisect_right(self.starts, offset_ms) - 1, 0)
+
+    def char_at(self, offset_ms):
+        # Number of the Morse character playing (or last played) at offset_ms
+        return max(bisect_right(self.char_positions, self.seek(offset_ms)) - 1, 0)
+
+    def progress(self, position):
+        return self.starts[position] / self.total_ms if self.total_ms else 1.0
+
+    def remaining_ms(self, position):
+        return self.total_ms - self.starts[position]
+
+
+@lru_cache(maxsize=256)
+def timing_index(morse_text, model=DEFAULT_TIMING):
+    return TimingIndex(morse_text, model)
+
+
+def total_duration_ms(morse_text, model=DEFAULT_TIMING):
+    # Same total as TimingIndex(morse_text, model).total_ms without building the index
+    return sum(duration * morse_text.count(symbol) for symbol, duration in symbol_durations(model).items())
+
+
+def queue_duration_ms(morse_texts, model=DEFAULT_TIMING):
+    return sum(total_duration_ms(morse_text, model) for morse_text in morse_texts)
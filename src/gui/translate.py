@@ -0,0 +1,358 @@
+import weakref
+import zlib
+from collections import namedtuple
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the batch API falls back to pure Python
+    np = None
+
+# Text <-> Morse translation, independent of the GUI.
+#
+# encode_message/decode_message hold the per-message logic used by the App.
+# encode_batch/decode_batch translate many messages at once and return a Batch
+# (offsets, buffer): message i is buffer[offsets[i]:offsets[i + 1]]. With NumPy
+# installed, ASCII batches are translated with lookup tables and gather
+# operations over one flat byte buffer instead of a Python loop per message.
+# Both also accept a Batch from join_batch, so inputs flattened once can be
+# translated and logged without joining them again. When the vectorized path
+# flattens a list itself, batch_inputs(offsets) hands those flattened inputs
+# back for as long as the returned offsets array is alive.
+
+MORSE_CODE_DICT = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.',
+    'F': '..-.', 'G': '--.', 'H': '....', 'I': '..', 'J': '.---',
+    'K': '-.-', 'L': '.-..', 'M': '--', 'N': '-.', 'O': '---',
+    'P': '.--.', 'Q': '--.-', 'R': '.-.', 'S': '...', 'T': '-',
+    'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-', 'Y': '-.--',
+    'Z': '--..',
+    '0': '-----', '1': '.----', '2': '..---', '3': '...--',
+    '4': '....-', '5': '.....', '6': '-....-', '7': '--...',
+    '8': '---..', '9': '----.',
+    '.': '.-.-.-', ',': '--..--', '?': '..--..', "'": '.----.',
+    '!': '-.-.--', '/': '-..-.', '(': '-.--.', ')': '-.--.-',
+    '&': '.-...', ':': '---...', ';': '-.-.-.', '=': '-...-',
+    '+': '.-.-.', '-': '-....-', '_': '..--.-', '"': '.-..-.',
+    '$': '...-..-', '@': '.--.-.', ' ': '/'
+}
+
+Batch = namedtuple('Batch', ['offsets', 'buffer'])
+
+# Longest dot/dash sequence the vectorized decoder looks up (keys need MAX_CODE_LENGTH + 1 bits)
+MAX_CODE_LENGTH = 8
+
+_DOT, _DASH, _SLASH, _SPACE = ord('.'), ord('-'), ord('/'), ord(' ')
+_REPLACED = ord('?')  # What the 'replace' error handler puts in place of non-ASCII
+_WHITESPACE = b' \t\n\r\x0b\x0c'
+
+
+def encode_message(text, code_dict):
+    # Unsupported characters are kept as-is
+    return ' '.join(code_dict.get(char, char) for char in text.upper())
+
+
+def decode_message(morse, reverse_dict):
+    decoded_words = []
+    for word_morse in morse.replace('\xa0', ' ').split('/'):
+        # .split() without args handles multiple spaces and leading/trailing spaces
+        characters_morse = word_morse.strip().split()
+        # Unknown codes are kept as-is
+        decoded_chars = [reverse_dict.get(char_morse, char_morse) for char_morse in characters_morse]
+        decoded_words.append(' '.join(decoded_chars))
+    # filter(None, ...) drops the empty words left by repeated '/'
+    return ' '.join(filter(None, decoded_words)).strip()
+
+
+def table_id(code_dict):
+    # Stable 32-bit fingerprint of a code table, e.g. for session logs
+    return zlib.crc32(repr(sorted(code_dict.items())).encode('utf-8'))
+
+
+def encode_batch(messages, code_dict, use_numpy=None):
+    messages = _as_sequence(messages)
+    if _want_numpy(use_numpy):
+        result = _encode_batch_numpy(messages, code_dict)
+        if result is not None:
+            return result
+    return _join_batch(encode_message(_as_str(message), code_dict) for message in _iter_messages(messages))
+
+
+def decode_batch(messages, reverse_dict, use_numpy=None):
+    messages = _as_sequence(messages)
+    if _want_numpy(use_numpy):
+        result = _decode_batch_numpy(messages, reverse_dict)
+        if result is not None:
+            return result
+    return _join_batch(decode_message(_as_str(message), reverse_dict) for message in _iter_messages(messages))
+
+
+def join_batch(messages):
+    # Flatten messages into a Batch (NumPy offsets when available)
+    messages = _as_sequence(messages)
+    if isinstance(messages, Batch):
+        return messages
+    if np is not None:
+        flattened = _flatten_ascii(messages)
+        if flattened is not None:
+            flat, offsets = flattened
+            return Batch(offsets, flat.tobytes().decode('ascii'))
+    return _join_batch(_as_str(message) for message in messages)
+
+
+def batch_inputs(offsets):
+    # The flattened inputs (a Batch) of the vectorized encode_batch/decode_batch
+    # call that returned these offsets, or None
+    entry = _flattened_inputs.get(id(offsets))
+    if entry is None or entry[0]() is not offsets:
+        return None
+    _, flat, msg_offsets = entry
+    return Batch(msg_offsets, flat.tobytes().decode('ascii'))
+
+
+def split_batch(offsets, buffer):
+    return [buffer[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _want_numpy(use_numpy):
+    if use_numpy and np is None:
+        raise ImportError("NumPy is required for use_numpy=True")
+    return np is not None and use_numpy is not False
+
+
+def _as_sequence(messages):
+    # Materialize iterators so the fallback path can still walk them
+    if isinstance(messages, (list, tuple)) or (np is not None and isinstance(messages, np.ndarray)):
+        return messages
+    return list(messages)
+
+
+def _iter_messages(messages):
+    return split_batch(*messages) if isinstance(messages, Batch) else messages
+
+
+def _as_str(message):
+    if isinstance(message, bytes):
+        try:
+            return message.decode('utf-8')
+        except UnicodeDecodeError:
+            return message.decode('latin-1')  # Any other bytes, kept byte-for-byte
+    return str(message)
+
+
+def _join_batch(outputs):
+    outputs = list(outputs)
+    offsets = [0]
+    offsets.extend(accumulate(len(output) for output in outputs))
+    return Batch(offsets, ''.join(outputs))
+
+
+# --- NumPy implementation ---
+# Flattened list inputs of live vectorized results, keyed by the id of the
+# output offsets array and dropped when it is garbage collected
+_flattened_inputs = {}
+
+
+def _remember_inputs(result, messages, flat, msg_offsets):
+    if not isinstance(messages, Batch):
+        key = id(result.offsets)
+        _flattened_inputs[key] = (weakref.ref(result.offsets), flat, msg_offsets)
+        weakref.finalize(result.offsets, _flattened_inputs.pop, key, None)
+    return result
+
+
+# Both directions return None when the batch needs the per-message path
+# (non-ASCII input to encode, or codes the lookup tables can't represent).
+# The decoder only sends the messages it can't handle, e.g. ones with unknown
+# codes, through decode_message and splices them into the vectorized result.
+
+def _flatten_ascii(messages, replace=False):
+    # Returns (flat uint8 buffer, int64 message offsets into it) or None.
+    # With replace, non-ASCII characters become '?' instead of returning None.
+    errors = 'replace' if replace else 'strict'
+    if isinstance(messages, Batch):
+        try:
+            flat = np.frombuffer(messages.buffer.encode('ascii', errors), dtype=np.uint8)
+        except UnicodeEncodeError:
+            return None
+        return flat, np.asarray(messages.offsets, dtype=np.int64)
+    if isinstance(messages, np.ndarray) and messages.dtype.kind in 'SU':
+        # Fixed-width string arrays: view the storage as a code-unit matrix
+        # and keep each row's first str_len entries.
+        arr = np.ascontiguousarray(messages.ravel())
+        lengths = np.char.str_len(arr).astype(np.int64)
+        unit = np.uint32 if arr.dtype.kind == 'U' else np.uint8
+        width = arr.dtype.itemsize // np.dtype(unit).itemsize
+        matrix = arr.view(unit).reshape(len(arr), width)
+        flat = matrix[np.arange(width) < lengths[:, None]]
+        if flat.size and flat.max() > 127:
+            if not replace:
+                return None
+            flat = np.where(flat > 127, _REPLACED, flat)
+        flat = flat.astype(np.uint8)
+    else:
+        try:
+            flat = np.frombuffer(''.join(messages).encode('ascii', errors), dtype=np.uint8)
+        except (UnicodeEncodeError, TypeError):
+            return None
+        lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return flat, offsets
+
+
+def _encode_tables(code_dict):
+    # Padded code table for every ASCII byte (upper-cased first like
+    # encode_message): row b holds the code for b followed by a space.
+    codes = []
+    for byte in range(128):
+        char = chr(byte).upper()
+        codes.append(code_dict.get(char, char))
+    width = max(map(len, codes)) + 1
+    try:
+        padded = b''.join(code.encode('ascii').ljust(width) for code in codes)
+    except UnicodeEncodeError:
+        return None
+    table = np.frombuffer(padded, dtype=np.uint8).reshape(128, width)
+    slot_len = np.fromiter(map(len, codes), dtype=np.int64, count=128) + 1
+    return table, slot_len
+
+
+def _encode_batch_numpy(messages, code_dict):
+    flattened = _flatten_ascii(messages)
+    tables = _encode_tables(code_dict)
+    if flattened is None or tables is None:
+        return None
+    flat, msg_offsets = flattened
+    table, slot_len = tables
+    n_messages = len(msg_offsets) - 1
+
+    # Every character becomes its code plus a separator: gather the padded
+    # rows and keep the first slot_len bytes of each.
+    char_slot = slot_len[flat]
+    rows = table[flat]
+    out = rows[np.arange(table.shape[1]) < char_slot[:, None]]
+
+    # Drop each message's trailing separator
+    slot_end = np.cumsum(char_slot)
+    msg_chars = np.diff(msg_offsets)
+    nonempty = msg_chars > 0
+    keep = np.ones(len(out), dtype=bool)
+    keep[slot_end[msg_offsets[1:][nonempty] - 1] - 1] = False
+
+    slot_end_cum = np.zeros(len(flat) + 1, dtype=np.int64)
+    slot_end_cum[1:] = slot_end
+    out_len = slot_end_cum[msg_offsets[1:]] - slot_end_cum[msg_offsets[:-1]] - nonempty
+    out_offsets = np.zeros(n_messages + 1, dtype=np.int64)
+    np.cumsum(out_len, out=out_offsets[1:])
+    return _remember_inputs(Batch(out_offsets, out[keep].tobytes().decode('ascii')), messages, flat, msg_offsets)
+
+
+def _decode_table(reverse_dict):
+    # Index by (1 << len) | bits, reading dots as 0 and dashes as 1
+    table = np.full(1 << (MAX_CODE_LENGTH + 1), -1, dtype=np.int16)
+    for code, char in reverse_dict.items():
+        if not code or len(code) > MAX_CODE_LENGTH or code.strip('.-'):
+            continue
+        if len(char) != 1 or ord(char) > 127:
+            return None
+        key = 1
+        for element in code:
+            key = (key << 1) | (element == '-')
+        table[key] = ord(char)
+    return table
+
+
+def _decode_batch_numpy(messages, reverse_dict):
+    table = _decode_table(reverse_dict)
+    if table is None:
+        return None
+    flattened = _flatten_ascii(messages)
+    exact = flattened is not None  # Otherwise the flattened inputs aren't worth keeping
+    if not exact:
+        flattened = _flatten_ascii(messages, replace=True)
+        if flattened is None:
+            return None
+    flat, msg_offsets = flattened
+    n_messages = len(msg_offsets) - 1
+
+    byte_class = np.zeros(256, dtype=np.uint8)  # 0: other, 1: dot, 2: dash, 3: separator
+    byte_class[_DOT], byte_class[_DASH] = 1, 2
+    byte_class[list(_WHITESPACE) + [_SLASH]] = 3
+    classes = byte_class[flat]
+
+    # Tokens are runs of non-separators that don't cross a message boundary
+    is_elem = classes < 3
+    starts = is_elem.copy()
+    starts[1:] &= ~is_elem[:-1]
+    ends = is_elem.copy()
+    ends[:-1] &= ~is_elem[1:]
+    boundaries = msg_offsets[1:-1][(msg_offsets[1:-1] > 0) & (msg_offsets[1:-1] < len(flat))]
+    starts[boundaries] = is_elem[boundaries]
+    ends[boundaries - 1] = is_elem[boundaries - 1]
+    token_start = np.flatnonzero(starts)
+    token_end = np.flatnonzero(ends) + 1
+
+    # Key each token by reading the bits just before its end, masked to its length
+    token_len = np.minimum(token_end - token_start, MAX_CODE_LENGTH)
+    dashes = np.zeros(len(flat) + MAX_CODE_LENGTH, dtype=np.int64)
+    dashes[MAX_CODE_LENGTH:] = classes == 2
+    keys = np.zeros(len(token_end), dtype=np.int64)
+    for k in range(1, MAX_CODE_LENGTH + 1):
+        keys |= dashes[token_end + MAX_CODE_LENGTH - k] << (k - 1)
+    keys = (keys & ((1 << token_len) - 1)) | (1 << token_len)
+    chars = table[keys]
+
+    # Tokens the table can't decode (other characters, too long, unknown codes)
+    # send their whole message to decode_message; drop their tokens here
+    other = np.zeros(len(flat) + 1, dtype=np.int64)
+    np.cumsum(classes == 0, out=other[1:])
+    bad_token = (chars < 0) | (token_end - token_start > MAX_CODE_LENGTH)
+    bad_token |= other[token_end] > other[token_start]
+    bad_messages = np.unique(np.searchsorted(msg_offsets, token_start[bad_token], side='right') - 1)
+    if len(bad_messages):
+        is_bad = np.zeros(n_messages, dtype=bool)
+        is_bad[bad_messages] = True
+        good = ~is_bad[np.searchsorted(msg_offsets, token_start, side='right') - 1]
+        token_start, chars = token_start[good], chars[good]
+
+    # Each message is its decoded tokens separated by single spaces
+    first_token = np.searchsorted(token_start, msg_offsets)
+    msg_tokens = np.diff(first_token)
+    out_offsets = np.zeros(n_messages + 1, dtype=np.int64)
+    np.cumsum(np.maximum(2 * msg_tokens - 1, 0), out=out_offsets[1:])
+
+    out = np.full(2 * len(chars), _SPACE, dtype=np.uint8)
+    out[0::2] = chars
+    keep = np.ones(len(out), dtype=bool)
+    keep[2 * (first_token[1:][msg_tokens > 0] - 1) + 1] = False
+    buffer = out[keep].tobytes().decode('ascii')
+    result = Batch(out_offsets, buffer)
+    if len(bad_messages):
+        result = _splice(out_offsets, buffer, bad_messages,
+                         [decode_message(_message_at(messages, i), reverse_dict) for i in bad_messages])
+    return _remember_inputs(result, messages, flat, msg_offsets) if exact else result
+
+
+def _message_at(messages, i):
+    if isinstance(messages, Batch):
+        return messages.buffer[messages.offsets[i]:messages.offsets[i + 1]]
+    if isinstance(messages, np.ndarray):
+        return _as_str(messages.ravel()[i])
+    return _as_str(messages[i])
+
+
+def _splice(offsets, buffer, indices, outputs):
+    # Put outputs[j] in place of message indices[j] (empty in buffer)
+    lengths = np.diff(offsets)
+    lengths[indices] = [len(output) for output in outputs]
+    new_offsets = np.zeros(len(offsets), dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    pieces = []
+    position = 0
+    for i, output in zip(indices, outputs):
+        pieces.append(buffer[position:offsets[i]])
+        pieces.append(output)
+        position = offsets[i]
+    pieces.append(buffer[position:])
+    return Batch(new_offsets, ''.join(pieces))